@@ -5,27 +5,47 @@ Script to add new banks to the CSV file
 import csv
 import os
 import sys
+from typing import List, Sequence
 
-def add_bank_to_csv(bank_id: str, bank_name: str, max_loan_amount: float, 
-                   min_interest_rate: float, reputation_score: int, risk_appetite: str):
-    """Add a new bank to the CSV file"""
+def add_banks_to_csv(banks: List[Sequence]) -> int:
+    """Add several banks to the CSV file in a single pass, skipping existing IDs
+
+    Each bank is a row of (bank_id, bank_name, max_loan_amount,
+    min_interest_rate, reputation_score, risk_appetite). Returns the number of
+    banks written.
+    """
     csv_path = os.path.join("data", "banks.csv")
     
-    # Check if bank already exists
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['bank_id'] == bank_id:
-                print(f"ERROR: Bank {bank_id} already exists in CSV")
-                return False
-    
-    # Add new bank
-    with open(csv_path, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([bank_id, bank_name, max_loan_amount, min_interest_rate, reputation_score, risk_appetite])
+    with open(csv_path, 'r+', newline='') as f:
+        content = f.read()
+        existing = {row[0] for row in csv.reader(content.splitlines()[1:]) if row}
+        
+        # Check which banks already exist
+        new_rows = []
+        for bank in banks:
+            if bank[0] in existing:
+                print(f"ERROR: Bank {bank[0]} already exists in CSV")
+                continue
+            existing.add(bank[0])
+            new_rows.append(list(bank))
+        
+        # Add new banks
+        if new_rows:
+            f.seek(0, os.SEEK_END)
+            if content and not content.endswith('\n'):
+                f.write('\n')
+            csv.writer(f).writerows(new_rows)
     
-    print(f"OK: Added bank {bank_name} ({bank_id}) to CSV")
-    return True
+    for row in new_rows:
+        print(f"OK: Added bank {row[1]} ({row[0]}) to CSV")
+    return len(new_rows)
+
+def add_bank_to_csv(bank_id: str, bank_name: str, max_loan_amount: float, 
+                   min_interest_rate: float, reputation_score: int, risk_appetite: str):
+    """Add a new bank to the CSV file"""
+    return add_banks_to_csv([
+        (bank_id, bank_name, max_loan_amount, min_interest_rate, reputation_score, risk_appetite)
+    ]) == 1
 
 def main():
     if len(sys.argv) != 7:
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable
 from datetime import datetime, timedelta
 import uuid
 
@@ -21,10 +22,21 @@ from shared.schema import (
 )
 from shared.config import BankConfig
 
+# ESG profile attached to every offer; ESGScore is frozen, so one instance
+# can be shared instead of validating an identical model per offer
+DEFAULT_ESG_SCORE = ESGScore(
+    environmental_score=8.5,
+    social_score=7.5,
+    governance_score=9.0,
+    overall_score=8.3,
+    carbon_footprint_category="low",
+    sustainability_notes="Strong ESG performance"
+)
+
 class WFAPBankAgent(A2AAgent):
     """WFAP Bank Agent implementation with A2A protocol support"""
 
-    def __init__(self, config: BankConfig):
+    def __init__(self, config: BankConfig, trusted_peers: Iterable[str] = ()):
         super().__init__(
             agent_id=f"bank-{config.bank_id.lower()}",
             name=config.bank_name,
@@ -32,6 +44,10 @@ class WFAPBankAgent(A2AAgent):
             description="WFAP Bank Agent for credit assessment and offer generation"
         )
         self.config = config
+        # Agent ids of internal services that build their replies from the same
+        # Pydantic models; their payloads skip a second validation. Replies
+        # from any other peer are fully validated.
+        self.trusted_peers: frozenset[str] = frozenset(trusted_peers)
         self.initialize_capabilities()
         self.logger.info(f"Initialized WFAP Bank Agent for {config.bank_name}")
 
@@ -78,7 +94,7 @@ class WFAPBankAgent(A2AAgent):
         if not validation_result.is_valid:
             return {
                 "status": "error",
-                "errors": [e.dict() for e in validation_result.errors]
+                "errors": [e.model_dump(mode="json") for e in validation_result.errors]
             }
 
         # Handle specific message types
@@ -91,19 +107,20 @@ class WFAPBankAgent(A2AAgent):
         """Handle credit intent message and generate offer"""
         try:
             # Parse credit intent
-            credit_intent = CreditIntent(**message.payload)
-            self.logger.info(f"Processing credit intent {credit_intent.intent_id}")
+            credit_intent = CreditIntent.model_validate(message.payload)
+            self.logger.info("Processing credit intent %s", credit_intent.intent_id)
 
-            # Get credit bureau data
-            credit_data = await self._get_credit_data(credit_intent.company_id)
+            # Get credit bureau and market data; the lookups are independent
+            credit_data, market_data = await asyncio.gather(
+                self._get_credit_data(credit_intent.company_id),
+                self._get_market_data(credit_intent.company_id)
+            )
             if not credit_data:
                 return {
                     "status": "error",
                     "message": "Unable to retrieve credit data"
                 }
 
-            # Get market data
-            market_data = await self._get_market_data(credit_intent.company_id)
             if not market_data:
                 return {
                     "status": "error",
@@ -116,32 +133,39 @@ class WFAPBankAgent(A2AAgent):
             # Send response
             response_payload = {
                 "status": "success",
-                "offer": offer.dict()
+                "offer": offer.model_dump(mode="json")
             }
 
-            self.logger.info(f"Generated offer {offer.offer_id} for intent {credit_intent.intent_id}")
+            self.logger.info("Generated offer %s for intent %s", offer.offer_id, credit_intent.intent_id)
             return response_payload
 
         except Exception as e:
-            self.logger.error(f"Error processing credit intent: {str(e)}")
+            self.logger.error("Error processing credit intent: %s", e)
             return {
                 "status": "error",
                 "message": f"Internal error: {str(e)}"
             }
 
+    def _parse_peer_data(self, model, peer_id: str, data: Dict[str, Any]):
+        """Build model from a peer's reply, validating unless the peer is trusted"""
+        if peer_id in self.trusted_peers:
+            return model.model_construct(**data)
+        return model.model_validate(data)
+
     async def _get_credit_data(self, company_id: str) -> Optional[CreditBureau]:
         """Retrieve credit data from credit bureau"""
         try:
             # Send message to credit bureau
+            peer_id = "credit-bureau"
             success, response = await self.send_message(
-                recipient_id="credit-bureau",
+                recipient_id=peer_id,
                 recipient_role=AgentRole.CREDIT_BUREAU,
                 message_type=MessageType.CREDIT_INTENT,
                 payload={"company_id": company_id}
             )
 
             if success and response and "credit_data" in response:
-                return CreditBureau(**response["credit_data"])
+                return self._parse_peer_data(CreditBureau, peer_id, response["credit_data"])
             return None
 
         except Exception as e:
@@ -152,15 +176,16 @@ class WFAPBankAgent(A2AAgent):
         """Retrieve market data"""
         try:
             # Send message to market data provider
+            peer_id = "market-data"
             success, response = await self.send_message(
-                recipient_id="market-data",
+                recipient_id=peer_id,
                 recipient_role=AgentRole.MARKET_DATA,
                 message_type=MessageType.CREDIT_INTENT,
                 payload={"company_id": company_id}
             )
 
             if success and response and "market_data" in response:
-                return MarketData(**response["market_data"])
+                return self._parse_peer_data(MarketData, peer_id, response["market_data"])
             return None
 
         except Exception as e:
@@ -213,14 +238,7 @@ class WFAPBankAgent(A2AAgent):
             carbon_adjusted_rate=esg_rate,
             processing_fee=0.1 * intent.amount,  # 0.1% processing fee
             collateral_required=intent.amount > 1_000_000,
-            esg_score=ESGScore(
-                environmental_score=8.5,
-                social_score=7.5,
-                governance_score=9.0,
-                overall_score=8.3,
-                carbon_footprint_category="low",
-                sustainability_notes="Strong ESG performance"
-            ),
+            esg_score=DEFAULT_ESG_SCORE,
             esg_summary="Favorable ESG profile with strong governance",
             offer_valid_until=datetime.utcnow() + timedelta(days=7),
             regulatory_compliance={
@@ -5,167 +5,235 @@ Company Agent - Handles bank discovery and credit intent broadcasting
 import asyncio
 import aiohttp
 import logging
+import orjson
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
+from urllib.parse import urlsplit
+from yarl import URL
 from shared.config import config
 from shared.schema import CreditIntent, CreditOffer
+from shared.validation import credit_intent_errors
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Registry discovery body; identical on every call, so encoded once
+DISCOVERY_REQUEST = orjson.dumps({
+    "requesting_agent_id": "company-agent",
+    "required_role": "bank"
+})
+
 class CompanyAgent:
     """Company agent for discovering banks and broadcasting credit intents"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        banks_ttl: float = 30.0,
+        broadcast_deadline: float = 30.0,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self.discovered_banks: List[Dict] = []
+        # Each discovered bank paired with its parsed assess-credit URL, so
+        # aiohttp does not re-parse the same URL string on every broadcast
+        self._bank_targets: List[tuple[Dict, URL]] = []
+        # Longest a broadcast waits for bank offers before returning what it has
+        self._broadcast_deadline = broadcast_deadline
+        # Discovered banks are reused for banks_ttl seconds; the lock keeps
+        # concurrent callers from each hitting the registry on a refresh
+        self._banks_ttl = banks_ttl
+        self._banks_expires_at = 0.0
+        self._discovery_result: Optional[Dict[str, Any]] = None
+        self._discovery_lock = asyncio.Lock()
         self.registry_url = f"http://localhost:{config.REGISTRY_PORT}"
+        # Bounds in-flight bank requests during a broadcast
+        self._bank_semaphore = asyncio.Semaphore(max_concurrency)
+        # A caller-supplied session is used as-is and left for the caller to close
+        self._session = session
+        self._owns_session = session is None
+        # A bank or registry that cannot accept a connection within 2 s is
+        # down; banks get no separate read budget because they reply only
+        # once their LLM-driven assessment has finished
+        self._bank_timeout = aiohttp.ClientTimeout(total=30, connect=2)
+        self._registry_timeout = aiohttp.ClientTimeout(total=10, connect=2, sock_read=5)
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the session shared by registry and bank requests, creating it on first use"""
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=32,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                )
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session; call on server shutdown"""
+        if not self._owns_session:
+            return
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def discover_bank_agents(self) -> Dict[str, Any]:
         """Discover available bank agents using registry service"""
         try:
-            async with aiohttp.ClientSession() as session:
-                discovery_request = {
-                    "requesting_agent_id": "company-agent",
-                    "required_role": "bank"
-                }
-                
-                async with session.post(
-                    f"{self.registry_url}/discovery",
-                    json=discovery_request,
-                    timeout=10
-                ) as response:
-                    if response.status == 200:
-                        discovery_data = await response.json()
-                        bank_agents = discovery_data.get("agents", [])
-                        
-                        # Filter for bank agents and extract port information
-                        filtered_banks = []
-                        for agent in bank_agents:
-                            if agent.get("role") == "bank":
-                                # Extract port from agent api_url
-                                api_url = agent.get("api_url", "")
-                                if "localhost:" in api_url:
-                                    port = int(api_url.split("localhost:")[1].split("/")[0])
-                                    # Create base URL without /a2a for WFAP endpoints
-                                    base_url = f"http://localhost:{port}"
-                                    bank_agent = {
-                                        "agent_id": agent.get("agent_id"),
-                                        "name": agent.get("name"),
-                                        "endpoint": base_url,
-                                        "port": port,
-                                        "bank_details": agent.get("bank_details", {})
-                                    }
-                                    filtered_banks.append(bank_agent)
-                        
-                        self.discovered_banks = filtered_banks
-                        logger.info(f"Discovered {len(filtered_banks)} bank agents from registry")
-                        return {
-                            "banks": filtered_banks,
-                            "count": len(filtered_banks),
-                            "timestamp": datetime.now().isoformat(),
-                            "source": "registry"
-                        }
-                    else:
-                        logger.error(f"Registry discovery failed with status {response.status}")
-                        return {
-                            "banks": [],
-                            "count": 0,
-                            "error": "Registry discovery failed",
-                            "timestamp": datetime.now().isoformat()
-                        }
-            
+            session = self._get_session()
+            async with session.post(
+                f"{self.registry_url}/discovery",
+                data=DISCOVERY_REQUEST,
+                headers={"Content-Type": "application/json"},
+                timeout=self._registry_timeout
+            ) as response:
+                if response.status == 200:
+                    discovery_data = orjson.loads(await response.read())
+                    bank_agents = discovery_data.get("agents", [])
+                    
+                    # Filter for bank agents and extract port information
+                    filtered_banks = []
+                    for agent in bank_agents:
+                        if agent.get("role") == "bank":
+                            # Extract host and port from agent api_url
+                            url = urlsplit(agent.get("api_url", ""))
+                            if url.hostname and url.port is not None:
+                                port = url.port
+                                # Create base URL without /a2a for WFAP endpoints
+                                base_url = f"{url.scheme}://{url.hostname}:{port}"
+                                bank_agent = {
+                                    "agent_id": agent.get("agent_id"),
+                                    "name": agent.get("name"),
+                                    "endpoint": base_url,
+                                    "port": port,
+                                    "bank_details": agent.get("bank_details", {})
+                                }
+                                filtered_banks.append(bank_agent)
+                    
+                    self.discovered_banks = filtered_banks
+                    self._bank_targets = [
+                        (bank, URL(f"{bank['endpoint']}/wfap/assess-credit"))
+                        for bank in filtered_banks
+                    ]
+                    self._banks_expires_at = time.monotonic() + self._banks_ttl
+                    logger.info(f"Discovered {len(filtered_banks)} bank agents from registry")
+                    self._discovery_result = {
+                        "banks": filtered_banks,
+                        "count": len(filtered_banks),
+                        "timestamp": datetime.now().isoformat(),
+                        "source": "registry"
+                    }
+                    return self._discovery_result
+                else:
+                    logger.error(f"Registry discovery failed with status {response.status}")
+                    return {
+                        "banks": [],
+                        "count": 0,
+                        "error": "Registry discovery failed",
+                        "timestamp": datetime.now().isoformat()
+                    }
+        
+        except asyncio.TimeoutError:
+            logger.error("Timed out waiting for the registry")
+            error = "Registry discovery timed out"
+        except aiohttp.ClientError as e:
+            logger.error(f"Connection error with the registry: {e}")
+            error = str(e)
         except Exception as e:
-            logger.error(f"Error discovering bank agents: {e}")
-            return {
-                "banks": [],
-                "count": 0,
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+            logger.exception("Error discovering bank agents")
+            error = str(e)
+        
+        return {
+            "banks": [],
+            "count": 0,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def get_bank_agents(self) -> Dict[str, Any]:
+        """Return the last discovery result while it is fresh, querying the registry otherwise"""
+        if self._discovery_result is None or time.monotonic() >= self._banks_expires_at:
+            async with self._discovery_lock:
+                # Another caller may have refreshed the result while we waited
+                if self._discovery_result is None or time.monotonic() >= self._banks_expires_at:
+                    return await self.discover_bank_agents()
+        return self._discovery_result
     
     async def broadcast_credit_intent(self, intent: CreditIntent) -> List[CreditOffer]:
         """Broadcast credit intent to all discovered bank agents"""
-        # First validate the intent through registry
-        validation_result = await self._validate_credit_intent(intent)
-        if not validation_result.get('valid', False):
-            logger.error(f"Credit intent validation failed: {validation_result.get('errors', [])}")
-            raise ValueError(f"Credit intent validation failed: {validation_result.get('message', 'Unknown error')}")
+        offers = [offer async for offer in self.iter_credit_offers(intent)]
+        logger.info(f"Received {len(offers)} offers from {len(self.discovered_banks)} banks")
+        return offers
+    
+    async def iter_credit_offers(self, intent: CreditIntent) -> AsyncIterator[CreditOffer]:
+        """Broadcast credit intent and yield offers as banks respond, until the deadline"""
+        # First check the registry's business rules; they are applied locally
+        # rather than paying a registry round-trip before every broadcast
+        validation_errors = credit_intent_errors(intent)
+        if validation_errors:
+            logger.error(f"Credit intent validation failed: {validation_errors}")
+            raise ValueError(f"Credit intent validation failed: {'; '.join(validation_errors)}")
         
-        if not self.discovered_banks:
-            await self.discover_bank_agents()
+        await self.get_bank_agents()
         
-        if not self.discovered_banks:
+        if not self._bank_targets:
             logger.error("No bank agents available for credit intent")
-            return []
+            return
         
-        offers = []
-        tasks = []
+        # Every bank receives the same body, so encode it once
+        payload = orjson.dumps(intent.model_dump())
         
         # Create tasks for all bank agents
-        for bank in self.discovered_banks:
-            task = asyncio.create_task(
-                self._send_credit_intent_to_bank(bank, intent)
-            )
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error with bank {self.discovered_banks[i]['name']}: {result}")
-            elif result:
-                offers.append(result)
+        tasks = [
+            asyncio.create_task(self._send_credit_intent_to_bank(bank, url, payload))
+            for bank, url in self._bank_targets
+        ]
         
-        logger.info(f"Received {len(offers)} offers from {len(self.discovered_banks)} banks")
-        return offers
-    
-    async def _validate_credit_intent(self, intent: CreditIntent) -> Dict[str, Any]:
-        """Validate credit intent through registry service"""
+        # Hand offers over as each bank answers; a slow bank only delays the
+        # caller up to the broadcast deadline
         try:
-            # Convert datetime to ISO string for JSON serialization
-            intent_data = intent.model_dump()
-            intent_data['timestamp'] = intent.timestamp.isoformat()
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.registry_url}/validate-credit-intent",
-                    json=intent_data,
-                    timeout=10
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Registry validation failed with status {response.status}")
-                        return {"valid": False, "errors": ["Registry validation failed"]}
-        except Exception as e:
-            logger.error(f"Error validating credit intent: {e}")
-            return {"valid": False, "errors": [str(e)]}
+            # _send_credit_intent_to_bank logs its own failures and returns None,
+            # so the only exception expected here is the deadline
+            for next_result in asyncio.as_completed(tasks, timeout=self._broadcast_deadline):
+                try:
+                    offer = await next_result
+                except asyncio.TimeoutError:
+                    pending = sum(not task.done() for task in tasks)
+                    logger.warning(f"Broadcast deadline reached with {pending} banks still pending")
+                    break
+                if offer is not None:
+                    yield offer
+        finally:
+            for task in tasks:
+                task.cancel()
     
-    async def _send_credit_intent_to_bank(self, bank: Dict, intent: CreditIntent) -> CreditOffer:
-        """Send credit intent to a specific bank agent"""
+    async def _send_credit_intent_to_bank(self, bank: Dict, url: URL, payload: bytes) -> Optional[CreditOffer]:
+        """Send a JSON-encoded credit intent to a specific bank agent"""
         try:
-            # Convert datetime to ISO string for JSON serialization
-            intent_data = intent.model_dump()
-            intent_data['timestamp'] = intent.timestamp.isoformat()
-            
-            async with aiohttp.ClientSession() as session:
+            session = self._get_session()
+            async with self._bank_semaphore:
                 async with session.post(
-                    f"{bank['endpoint']}/wfap/assess-credit",
-                    json=intent_data,
-                    timeout=30
+                    url,
+                    data=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self._bank_timeout
                 ) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = orjson.loads(await response.read())
                         if data.get("status") == "success":
-                            return CreditOffer(**data["offer"])
+                            return CreditOffer.model_validate(data["offer"])
                         else:
                             logger.warning(f"Bank {bank['name']} returned error: {data.get('message')}")
                     else:
                         logger.warning(f"Bank {bank['name']} returned status {response.status}")
-        except Exception as e:
-            logger.error(f"Error communicating with bank {bank['name']}: {e}")
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out waiting for bank {bank['name']}")
+        except aiohttp.ClientError as e:
+            logger.error(f"Connection error with bank {bank['name']}: {e}")
+        except Exception:
+            logger.exception(f"Error communicating with bank {bank['name']}")
         
         return None
 
@@ -1,20 +1,34 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage
 import json
+import hashlib
+import functools
+import heapq
 import aiohttp
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from pydantic import TypeAdapter, ValidationError
 from shared.schema import CreditIntent, CreditOffer, OfferEvaluation
 from shared.config import config
+from shared.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Converters for the JSON strings exchanged with the LLM tool interface
+CREDIT_OFFER_LIST = TypeAdapter(List[CreditOffer])
+OFFER_EVALUATION_LIST = TypeAdapter(List[OfferEvaluation])
+
+# Recent LLM explanations, so re-evaluating the same offers does not re-prompt
+_REASONING_CACHE = TTLCache(maxsize=1024, ttl=300)
+
 class CompanyFinanceAgent:
     def __init__(self):
+        # Imported here: the Gemini client pulls in gRPC and Google auth, which
+        # importing this module should not pay for until an agent is needed
+        from langchain_google_genai import ChatGoogleGenerativeAI
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-flash-lite",
             google_api_key=config.GEMINI_API_KEY,
@@ -25,17 +39,20 @@ class CompanyFinanceAgent:
             Tool(
                 name="create_credit_intent",
                 description="Create a structured credit request based on company needs",
-                func=self.create_credit_intent
+                func=None,
+                coroutine=self.create_credit_intent
             ),
             Tool(
                 name="evaluate_offers",
                 description="Evaluate and rank multiple bank offers using multi-criteria analysis",
-                func=self.evaluate_offers
+                func=None,
+                coroutine=self.evaluate_offers_json
             ),
             Tool(
                 name="generate_decision_reasoning", 
                 description="Generate human-readable explanation for offer selection",
-                func=self.generate_decision_reasoning
+                func=None,
+                coroutine=self.generate_decision_reasoning
             )
         ]
         
@@ -54,7 +71,7 @@ class CompanyFinanceAgent:
         Thought: {agent_scratchpad}
         """)
         
-    def create_credit_intent(self, requirements: str) -> str:
+    async def create_credit_intent(self, requirements: str) -> str:
         """Create structured credit intent from natural language requirements"""
         prompt = f"""
         Based on these company requirements, create a structured credit intent:
@@ -70,33 +87,64 @@ class CompanyFinanceAgent:
         """
         
         try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            # Parse and validate the response
-            intent_data = json.loads(response.content)
-            intent = CreditIntent(**intent_data)
-            return json.dumps(intent.dict(), default=str)
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            # Parse and validate the response in one pass
+            intent = CreditIntent.model_validate_json(response.content)
+            return intent.model_dump_json()
+        except ValidationError as e:
+            logger.warning(f"LLM returned an invalid credit intent: {e}")
+            return json.dumps({"error": str(e)})
         except Exception as e:
-            logger.error(f"Error creating credit intent: {e}")
+            logger.exception("Error creating credit intent")
             return json.dumps({"error": str(e)})
     
-    def evaluate_offers(self, offers_json: str) -> str:
-        """Evaluate multiple bank offers using multi-criteria analysis"""
+    async def evaluate_offers(
+        self,
+        offers: List[CreditOffer],
+        top_k: Optional[int] = None
+    ) -> List[OfferEvaluation]:
+        """Evaluate bank offers using multi-criteria analysis, best first; keep only top_k if given"""
+        scored = [(self._evaluate_single_offer(offer), offer) for offer in offers]
+        
+        # Rank offers by total score; only the kept offers get LLM reasoning
+        if top_k is None:
+            scored.sort(key=lambda pair: pair[0].total_score, reverse=True)
+        else:
+            scored = heapq.nlargest(top_k, scored, key=lambda pair: pair[0].total_score)
+        evaluations = [evaluation for evaluation, _ in scored]
+        offers = [offer for _, offer in scored]
+        
+        # Reuse recent explanations; one LLM call explains all remaining offers
+        # instead of one round trip per offer
+        cache_keys = [self._reasoning_cache_key(evaluation) for evaluation in evaluations]
+        cached = [_REASONING_CACHE.get(key) for key in cache_keys]
+        uncached = [i for i, reasoning in enumerate(cached) if reasoning is None]
+        logger.debug(f"Reasoning cache: {len(offers) - len(uncached)} hits, {len(uncached)} misses")
+        reasonings = await self._generate_reasoning(
+            [offers[i] for i in uncached], [evaluations[i] for i in uncached]
+        )
+        
+        for offer, evaluation, key, reasoning in zip(offers, evaluations, cache_keys, cached):
+            if reasoning is None:
+                reasoning = reasonings.get(offer.offer_id)
+                if reasoning:
+                    _REASONING_CACHE.set(key, reasoning)
+            evaluation.reasoning = reasoning or self._fallback_reasoning(offer)
+        
+        return evaluations
+    
+    async def evaluate_offers_json(self, offers_json: str) -> str:
+        """Tool entry point: evaluate offers given and returned as JSON text"""
         try:
-            offers_data = json.loads(offers_json)
-            offers = [CreditOffer(**offer) for offer in offers_data]
-            
-            evaluations = []
-            for offer in offers:
-                evaluation = self._evaluate_single_offer(offer)
-                evaluations.append(evaluation)
-            
-            # Rank offers by total score
-            evaluations.sort(key=lambda x: x.total_score, reverse=True)
-            
-            return json.dumps([eval.dict() for eval in evaluations], default=str)
+            offers = CREDIT_OFFER_LIST.validate_json(offers_json)
+            evaluations = await self.evaluate_offers(offers)
+            return OFFER_EVALUATION_LIST.dump_json(evaluations).decode()
             
+        except ValidationError as e:
+            logger.warning(f"Invalid offers passed for evaluation: {e}")
+            return json.dumps({"error": str(e)})
         except Exception as e:
-            logger.error(f"Error evaluating offers: {e}")
+            logger.exception("Error evaluating offers")
             return json.dumps({"error": str(e)})
     
     def _evaluate_single_offer(self, offer: CreditOffer) -> OfferEvaluation:
@@ -121,9 +169,6 @@ class CompanyFinanceAgent:
         # Generate recommendation
         recommendation = "accept" if total_score >= 75 else "negotiate" if total_score >= 60 else "reject"
         
-        # Generate reasoning using LLM
-        reasoning = self._generate_reasoning(offer, financial_score, esg_score, terms_score, total_score)
-        
         return OfferEvaluation(
             offer_id=offer.offer_id,
             total_score=total_score,
@@ -131,7 +176,7 @@ class CompanyFinanceAgent:
             esg_score=esg_score,
             terms_score=terms_score,
             recommendation=recommendation,
-            reasoning=reasoning
+            reasoning=""  # filled in by evaluate_offers, batched across offers
         )
     
     def _calculate_financial_score(self, offer: CreditOffer) -> float:
@@ -164,35 +209,65 @@ class CompanyFinanceAgent:
         
         return (collateral_score * 0.4 + penalty_score * 0.3 + grace_score * 0.3)
     
-    def _generate_reasoning(self, offer: CreditOffer, financial_score: float, 
-                          esg_score: float, terms_score: float, total_score: float) -> str:
-        """Generate human-readable reasoning for the evaluation"""
-        
-        prompt = f"""
-        Generate a concise explanation for why this bank offer received a score of {total_score:.1f}/100:
+    async def _generate_reasoning(self, offers: List[CreditOffer],
+                                  evaluations: List[OfferEvaluation]) -> Dict[str, str]:
+        """Generate human-readable reasoning for each evaluation, keyed by offer_id"""
+        if not offers:
+            return {}
         
+        offer_sections = "\n".join(
+            f"""
+        Offer ID: {offer.offer_id}
         Bank: {offer.bank_name}
-        Financial Score: {financial_score:.1f}/100
-        ESG Score: {esg_score:.1f}/100  
-        Terms Score: {terms_score:.1f}/100
-        
-        Key Details:
+        Total Score: {evaluation.total_score:.1f}/100
+        Financial Score: {evaluation.financial_score:.1f}/100
+        ESG Score: {evaluation.esg_score:.1f}/100  
+        Terms Score: {evaluation.terms_score:.1f}/100
         - Interest Rate: {offer.interest_rate}% (Carbon-adjusted: {offer.carbon_adjusted_rate}%)
         - Approved Amount: ${offer.approved_amount:,.2f}
         - ESG Overall Score: {offer.esg_score.overall_score}/10
         - Collateral Required: {offer.collateral_required}
-        - Processing Fee: ${offer.processing_fee:,.2f}
+        - Processing Fee: ${offer.processing_fee:,.2f}"""
+            for offer, evaluation in zip(offers, evaluations)
+        )
+        
+        prompt = f"""
+        Generate a concise explanation for why each of these bank offers received its score:
+        {offer_sections}
         
-        Provide a 2-3 sentence explanation focusing on the key strengths and weaknesses.
+        For each offer, provide a 2-3 sentence explanation focusing on the key strengths and weaknesses.
+        Return a JSON object mapping each Offer ID to its explanation.
         """
         
         try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            return response.content.strip()
-        except Exception as e:
-            return f"Standard evaluation based on rate ({offer.carbon_adjusted_rate}%), ESG score ({offer.esg_score.overall_score}/10), and terms."
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            content = response.content
+            reasonings = json.loads(content[content.find("{"):content.rfind("}") + 1])
+            return {offer_id: str(text).strip() for offer_id, text in reasonings.items()}
+        except (ValueError, AttributeError) as e:
+            # Unparseable or non-object reply; callers fall back per offer
+            logger.warning(f"LLM returned unusable offer reasoning: {e}")
+            return {}
+        except Exception:
+            logger.exception("Error generating offer reasoning")
+            return {}
+    
+    def _reasoning_cache_key(self, evaluation: OfferEvaluation) -> tuple:
+        """Cache key for an offer's explanation: the offer and its rounded scores"""
+        return (
+            "offer",
+            evaluation.offer_id,
+            round(evaluation.total_score, 1),
+            round(evaluation.financial_score, 1),
+            round(evaluation.esg_score, 1),
+            round(evaluation.terms_score, 1)
+        )
     
-    def generate_decision_reasoning(self, evaluation_results: str) -> str:
+    def _fallback_reasoning(self, offer: CreditOffer) -> str:
+        """Static reasoning used when the LLM gives no explanation for an offer"""
+        return f"Standard evaluation based on rate ({offer.carbon_adjusted_rate}%), ESG score ({offer.esg_score.overall_score}/10), and terms."
+    
+    async def generate_decision_reasoning(self, evaluation_results: str) -> str:
         """Generate overall decision reasoning for the best offer"""
         prompt = f"""
         Based on these offer evaluations, provide a clear explanation of why the top-ranked offer 
@@ -203,12 +278,23 @@ class CompanyFinanceAgent:
         Provide a comprehensive but concise explanation suitable for executive review.
         """
         
+        cache_key = ("decision", hashlib.blake2b(evaluation_results.encode(), digest_size=16).digest())
+        reasoning = _REASONING_CACHE.get(cache_key)
+        if reasoning is not None:
+            logger.debug("Decision reasoning cache hit")
+            return reasoning
+        logger.debug("Decision reasoning cache miss")
+        
         try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            return response.content.strip()
-        except Exception as e:
-            logger.error(f"Error generating decision reasoning: {e}")
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            reasoning = response.content.strip()
+            _REASONING_CACHE.set(cache_key, reasoning)
+            return reasoning
+        except Exception:
+            logger.exception("Error generating decision reasoning")
             return "Decision based on optimal balance of financial terms, ESG alignment, and contract flexibility."
 
-# Global agent instance
-company_agent = CompanyFinanceAgent()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_company_agent() -> CompanyFinanceAgent:
+    """Return the process-wide agent, building it and its Gemini client on first use"""
+    return CompanyFinanceAgent()
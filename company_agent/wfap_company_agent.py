@@ -4,6 +4,8 @@ from datetime import datetime
 import uuid
 import asyncio
 
+from pydantic import ValidationError
+
 from shared.a2a_agent import A2AAgent
 from shared.a2a_schema import (
     AgentRole,
@@ -82,7 +84,7 @@ class WFAPCompanyAgent(A2AAgent):
         if not validation_result.is_valid:
             return {
                 "status": "error",
-                "errors": [e.dict() for e in validation_result.errors]
+                "errors": [e.model_dump(mode="json") for e in validation_result.errors]
             }
 
         # Handle specific message types
@@ -121,7 +123,8 @@ class WFAPCompanyAgent(A2AAgent):
                 self.logger.error("No banks found for credit intent")
                 return None
 
-            # Broadcast to banks
+            # Broadcast to banks; every bank receives the same payload, so dump it once
+            payload = intent.model_dump(mode="json")
             tasks = []
             for bank in bank_agents:
                 tasks.append(
@@ -129,7 +132,7 @@ class WFAPCompanyAgent(A2AAgent):
                         recipient_id=bank.agent_id,
                         recipient_role=AgentRole.BANK,
                         message_type=MessageType.CREDIT_INTENT,
-                        payload=intent.dict(),
+                        payload=payload,
                         conversation_id=intent.intent_id
                     )
                 )
@@ -141,15 +144,15 @@ class WFAPCompanyAgent(A2AAgent):
 
             return intent.intent_id
 
-        except Exception as e:
-            self.logger.error(f"Error creating credit intent: {str(e)}")
+        except Exception:
+            self.logger.exception("Error creating credit intent")
             return None
 
     async def _handle_credit_offer(self, message: AgentMessage) -> Dict[str, Any]:
         """Handle received credit offers"""
         try:
             # Parse offer
-            offer = CreditOffer(**message.payload)
+            offer = CreditOffer.model_validate(message.payload)
             
             # Store offer
             if offer.intent_id not in self.received_offers:
@@ -162,22 +165,28 @@ class WFAPCompanyAgent(A2AAgent):
             )
 
             # Evaluate offer
-            evaluation = await self._evaluate_offer(offer)
+            evaluation = self._evaluate_offer(offer)
             
             return {
                 "status": "success",
                 "message": "Offer received and evaluated",
-                "evaluation": evaluation.dict()
+                "evaluation": evaluation.model_dump(mode="json")
             }
 
+        except ValidationError as e:
+            self.logger.warning(f"Rejected malformed credit offer: {e}")
+            return {
+                "status": "error",
+                "message": f"Invalid credit offer: {e}"
+            }
         except Exception as e:
-            self.logger.error(f"Error handling credit offer: {str(e)}")
+            self.logger.exception("Error handling credit offer")
             return {
                 "status": "error",
                 "message": f"Internal error: {str(e)}"
             }
 
-    async def _evaluate_offer(self, offer: CreditOffer) -> OfferEvaluation:
+    def _evaluate_offer(self, offer: CreditOffer) -> OfferEvaluation:
         """Evaluate a credit offer"""
         # Get original intent
         intent = self.active_intents.get(offer.intent_id)
@@ -325,13 +334,13 @@ class WFAPCompanyAgent(A2AAgent):
                 payload=DiscoveryRequest(
                     requesting_agent_id=self.agent_id,
                     required_role=AgentRole.BANK
-                ).dict()
+                ).model_dump(mode="json")
             )
 
             if success and response and "agents" in response:
                 return response["agents"]
             return []
 
-        except Exception as e:
-            self.logger.error(f"Error discovering banks: {str(e)}")
+        except Exception:
+            self.logger.exception("Error discovering banks")
             return []
@@ -1,27 +1,123 @@
 import os
-import requests
+import re
+import sys
 import json
+import hashlib
+import random
+import asyncio
+import aiohttp
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.rate_limiter import AsyncRateLimiter
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 HEADERS = {
     "Authorization": f"Bearer {OPENROUTER_API_KEY}",
     "Content-Type": "application/json",
 }
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+MAX_BACKOFF = 30
+# Large row counts are split into prompts of ROWS_PER_CALL rows generated
+# concurrently, within OpenRouter's requests-per-minute limit
+ROWS_PER_CALL = 10
+MAX_CONCURRENCY = 10
+REQUEST_SEMAPHORE = asyncio.Semaphore(MAX_CONCURRENCY)
+RATE_LIMITER = AsyncRateLimiter(int(os.getenv("OPENROUTER_RPM", "20")), 60)
+# A "===NAME===" marker line followed by that section's CSV, up to the next marker
+SECTION_PATTERN = re.compile(r"===(\w+)===[ \t]*\n(.*?)(?====\w+===|\Z)", re.DOTALL)
+
+# Responses are cached by prompt so re-running the generator is free;
+# disable with GENERATOR_CACHE=0 or --no-cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+USE_CACHE = os.getenv("GENERATOR_CACHE", "1") == "1"
+
+class OpenRouterStreamError(Exception):
+    """An error OpenRouter reported inside the event stream after a 200 status"""
+
+async def call_openrouter_chat(session, messages, model="mistralai/mistral-small-3.2-24b-instruct:free"):
+    if not USE_CACHE:
+        return await request_openrouter_chat(session, messages, model)
+
+    key = hashlib.blake2b(
+        json.dumps({"model": model, "messages": messages}, sort_keys=True).encode(),
+        digest_size=16,
+    ).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"{key}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as f:
+            return f.read()
 
-def call_openrouter_chat(messages, model="mistralai/mistral-small-3.2-24b-instruct:free"):
+    content = await request_openrouter_chat(session, messages, model)
+    if content:
+        # Write then rename, so an interrupted run never leaves a partial entry
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, cache_path)
+    return content
+
+async def request_openrouter_chat(session, messages, model):
     data = {
         "model": model,
         "messages": messages,
+        "stream": True,
+        "stream_options": {"include_usage": True},
     }
-    response = requests.post(
-        url="https://openrouter.ai/api/v1/chat/completions",
-        headers=HEADERS,
-        data=json.dumps(data),
-    )
-    response.raise_for_status()
-    return response.json()['choices'][0]['message']['content'].strip()
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            await RATE_LIMITER.acquire()
+            async with REQUEST_SEMAPHORE, session.post(
+                url="https://openrouter.ai/api/v1/chat/completions",
+                json=data,
+            ) as response:
+                if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    response.raise_for_status()
+                    return (await read_streamed_content(response)).strip()
+                retry_after = response.headers.get("Retry-After")
+                print(f"OpenRouter returned {response.status}, retrying")
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                asyncio.TimeoutError, OpenRouterStreamError) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            print(f"OpenRouter request failed ({e!r}), retrying")
+        await asyncio.sleep(retry_delay(attempt, retry_after))
+
+def retry_delay(attempt, retry_after=None):
+    # Honour the server's Retry-After (seconds form); otherwise jittered exponential backoff
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), MAX_BACKOFF)
+    return random.uniform(0, min(MAX_BACKOFF, 2 ** attempt))
 
-def generate_company_data(n = 5):
+async def read_streamed_content(response):
+    # Server-sent events: one "data: {...}" chunk per line, ending with "data: [DONE]"
+    content = []
+    async for line in response.content:
+        line = line.strip()
+        if not line.startswith(b"data: "):
+            continue  # blank separators and ": keep-alive" comments
+        payload = line[len(b"data: "):]
+        if payload == b"[DONE]":
+            break
+        chunk = json.loads(payload)
+        if chunk.get("error"):
+            # Failures after the stream has started arrive as an error frame
+            raise OpenRouterStreamError(chunk["error"])
+        if chunk.get("choices"):
+            content.append(chunk["choices"][0]["delta"].get("content") or "")
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+            print(f"Tokens used: {usage.get('prompt_tokens')} prompt, {usage.get('completion_tokens')} completion")
+    return "".join(content)
+
+async def generate_company_data(session, n = 5):
+    return await generate_in_chunks(session, generate_company_rows, n)
+
+async def generate_company_rows(session, n, offset):
     prompt_text = f"""
 Generate {n} rows of CSV data that matches the following dataclass:
 
@@ -36,11 +132,11 @@ Use company_names from Company A, Company B, Company C, Company D with realistic
 company_id,company_name,annual_revenue,industry
 Do not return anything other than the csv, no text or response of your own
 No ```csv formatting etc. just a header and {n} comma separated rows.
-"""
+""" + continuation_note(offset, n)
     messages = [{"role": "user", "content": [{"type":"text", "text": prompt_text}]}]
-    return call_openrouter_chat(messages)
+    return await call_openrouter_chat(session, messages)
 
-def generate_market_and_credit_data(company_csv):
+async def generate_market_and_credit_data(session, company_csv):
     prompt_text = f"""
 Given the following CSV data of Company:
 
@@ -77,9 +173,12 @@ Do not return anything other than the csv, and the markers, no text or response
 No ```csv formatting etc. just a marker, header and comma separated rows then next marker header and comma separated rows.
 """
     messages = [{"role": "user", "content": [{"type":"text", "text": prompt_text}]}]
-    return call_openrouter_chat(messages)
+    return await call_openrouter_chat(session, messages)
 
-def generate_bank_data(n = 5):
+async def generate_bank_data(session, n = 5):
+    return await generate_in_chunks(session, generate_bank_rows, n)
+
+async def generate_bank_rows(session, n, offset):
     prompt_text = f"""
 Generate {n} rows of CSV data that matches the following dataclass:
 
@@ -97,11 +196,11 @@ Use bank_name from Bank A, Bank B, Bank C, Bank D with realistic values. Return
 bank_id,bank_name,max_loan_amount,min_interest_rate,reputation_score,risk_appetite,esg_data
 Do not return anything other than the csv, no text or response of your own
 No ```csv formatting etc. just a header and {n} comma separated rows.
-"""
+""" + continuation_note(offset, n)
     messages = [{"role": "user", "content": [{"type":"text", "text": prompt_text}]}]
-    return call_openrouter_chat(messages)
+    return await call_openrouter_chat(session, messages)
 
-def generate_esg_data(bank_csv):
+async def generate_esg_data(session, bank_csv):
     prompt_text = f"""
 Given the following CSV data of Company:
 
@@ -127,43 +226,71 @@ Do not return anything other than the csv, no text or response of your own
 No ```csv formatting etc. just a header and comma separated rows.
 """
     messages = [{"role": "user", "content": [{"type":"text", "text": prompt_text}]}]
-    return call_openrouter_chat(messages)
+    return await call_openrouter_chat(session, messages)
+
+def continuation_note(offset, n):
+    if offset == 0:
+        return ""
+    return f"""These are rows {offset + 1} to {offset + n} of a larger set. Continue the id and name
+sequences from row {offset + 1} so no row repeats an earlier one.
+"""
+
+async def generate_in_chunks(session, generate_rows, n):
+    if n <= 0:
+        return ""
+    offsets = range(0, n, ROWS_PER_CALL)
+    chunks = await asyncio.gather(*(
+        generate_rows(session, min(ROWS_PER_CALL, n - offset), offset) for offset in offsets
+    ))
+    # Every chunk starts with the header row; keep only the first one
+    rows = [chunks[0]] + [chunk.split("\n", 1)[1] for chunk in chunks[1:] if "\n" in chunk]
+    return "\n".join(rows)
 
 def save_csv(filename, data):
     with open(filename, "w") as f:
         f.write(data)
 
+def split_sections(data):
+    return {m.group(1): m.group(2).strip() for m in SECTION_PATTERN.finditer(data)}
+
 def save_two_csv(data, market_file, credit_file):
-    parts = data.split("===")
-    market_csv = ""
-    credit_csv = ""
-    for i in range(len(parts)):
-        part = parts[i]
-        part_strip = part.strip()
-        if part_strip.startswith("MARKETDATA"):
-            market_csv = parts[i+1].split("\n", 1)[1].strip()
-            i+=1
-        elif part_strip.startswith("CREDITBUREAU"):
-            credit_csv = parts[i+1].split("\n", 1)[1].strip()
-            i+=1
+    sections = split_sections(data)
+    market_csv = sections.get("MARKETDATA")
+    credit_csv = sections.get("CREDITBUREAU")
     if market_csv:
         save_csv(market_file, market_csv)
     if credit_csv:
         save_csv(credit_file, credit_csv)
 
-if __name__ == "__main__":
-    companies = generate_company_data()
+async def generate_company_files(session):
+    companies = await generate_company_data(session)
     save_csv("companies.csv", companies)
     print("Saved companies.csv")
 
-    market_credit = generate_market_and_credit_data(companies)
+    market_credit = await generate_market_and_credit_data(session, companies)
     save_two_csv(market_credit, "market_data.csv", "credit_bureau.csv")
     print("Saved market_data.csv and credit_bureau.csv")
 
-    banks = generate_bank_data()
+async def generate_bank_files(session):
+    banks = await generate_bank_data(session)
     save_csv("banks.csv", banks)
     print("Saved banks.csv")
 
-    esg_regulator = generate_esg_data(banks)
+    esg_regulator = await generate_esg_data(session, banks)
     save_csv("esg_regulator.csv", esg_regulator)
     print("Saved esg_regulator.csv")
+
+async def main():
+    # The company and bank chains are independent, so their requests overlap
+    # One keep-alive pool for every call; generations can take up to two minutes
+    async with aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=aiohttp.TCPConnector(limit=8),
+        timeout=aiohttp.ClientTimeout(total=120, connect=5),
+    ) as session:
+        await asyncio.gather(generate_company_files(session), generate_bank_files(session))
+
+if __name__ == "__main__":
+    if "--no-cache" in sys.argv:
+        USE_CACHE = False
+    asyncio.run(main())
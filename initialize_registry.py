@@ -51,6 +51,20 @@ def save_port_assignments():
         import json
         json.dump(assignments, f, indent=2)
 
+MAX_CONCURRENT_REGISTRATIONS = 10
+
+async def _register_one(session, semaphore, url, entity, name):
+    """Register a single bank or company, printing the outcome"""
+    try:
+        async with semaphore:
+            async with session.post(url, json=entity.model_dump()) as response:
+                if response.status == 200:
+                    print(f"OK: Successfully registered {name}")
+                else:
+                    print(f"ERROR: Failed to register {name}: {response.status}")
+    except Exception as e:
+        print(f"ERROR: Error registering {name}: {str(e)}")
+
 async def register_entities():
     """Register all banks and companies with the registry"""
     # Save port assignments before registration
@@ -68,35 +82,15 @@ async def register_entities():
             print("Could not connect to registry service. Make sure it's running.")
             return
 
-        # Register banks
-        print("\nRegistering banks...")
-        for bank in BANKS:
-            try:
-                async with session.post(
-                    f"http://localhost:{config.REGISTRY_PORT}/bankRegister",
-                    json=bank.model_dump()
-                ) as response:
-                    if response.status == 200:
-                        print(f"OK: Successfully registered {bank.bank_name}")
-                    else:
-                        print(f"ERROR: Failed to register {bank.bank_name}: {response.status}")
-            except Exception as e:
-                print(f"ERROR: Error registering {bank.bank_name}: {str(e)}")
-
-        # Register companies
-        print("\nRegistering companies...")
-        for company in COMPANIES:
-            try:
-                async with session.post(
-                    f"http://localhost:{config.REGISTRY_PORT}/companyRegister",
-                    json=company.model_dump()
-                ) as response:
-                    if response.status == 200:
-                        print(f"OK: Successfully registered {company.company_name}")
-                    else:
-                        print(f"ERROR: Failed to register {company.company_name}: {response.status}")
-            except Exception as e:
-                print(f"ERROR: Error registering {company.company_name}: {str(e)}")
+        # Register banks and companies concurrently
+        bank_url = f"http://localhost:{config.REGISTRY_PORT}/bankRegister"
+        company_url = f"http://localhost:{config.REGISTRY_PORT}/companyRegister"
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REGISTRATIONS)
+        print("\nRegistering banks and companies...")
+        await asyncio.gather(
+            *[_register_one(session, semaphore, bank_url, bank, bank.bank_name) for bank in BANKS],
+            *[_register_one(session, semaphore, company_url, company, company.company_name) for company in COMPANIES]
+        )
 
         # Verify final state
         print("\nVerifying registry state...")
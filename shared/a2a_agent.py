@@ -20,12 +20,6 @@ from .a2a_schema import (
 )
 from .config import config
 
-# Configure logging
-logging.basicConfig(
-    level=config.LOG_LEVEL,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 class A2AAgent:
     """Base class for all WFAP agents implementing A2A protocol"""
     
@@ -46,6 +40,10 @@ class A2AAgent:
         self.skills: List[AgentSkill] = []
         self.endpoints: List[AgentEndpoint] = []
         self.supported_message_types: List[MessageType] = []
+        # Shared by every registry and A2A request so connections are kept alive;
+        # owners must release it with aclose() or by using the agent as an
+        # async context manager
+        self._session: Optional[aiohttp.ClientSession] = None
         self._initialize_agent()
 
     def _initialize_agent(self):
@@ -63,6 +61,30 @@ class A2AAgent:
         # Log initialization
         self.logger.info(f"Initialized {self.role} agent: {self.name} ({self.agent_id})")
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the agent's HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300
+                )
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close the agent's HTTP session; call on shutdown"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "A2AAgent":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
     def add_skill(self, skill: AgentSkill):
         """Add a new skill to the agent"""
         self.skills.append(skill)
@@ -165,26 +187,27 @@ class A2AAgent:
             if not endpoint:
                 raise HTTPException(status_code=404, detail=f"No endpoint found for agent {recipient_id}")
 
-            # Send message
-            async with aiohttp.ClientSession() as session:
-                headers = {"Content-Type": "application/json"}
-                async with session.post(
-                    endpoint,
-                    json=message.dict(),
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        response_data = await response.json()
-                        self.logger.info(
-                            f"Successfully sent {message_type} message to {recipient_role} {recipient_id}"
-                        )
-                        return True, response_data
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(
-                            f"Failed to send message: Status {response.status} - {error_text}"
-                        )
-                        return False, None
+            # Send message, serialized by pydantic in one pass instead of
+            # model_dump followed by aiohttp's stdlib json.dumps
+            session = self._get_session()
+            headers = {"Content-Type": "application/json"}
+            async with session.post(
+                endpoint,
+                data=message.model_dump_json(),
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    response_data = await response.json()
+                    self.logger.info(
+                        f"Successfully sent {message_type} message to {recipient_role} {recipient_id}"
+                    )
+                    return True, response_data
+                else:
+                    error_text = await response.text()
+                    self.logger.error(
+                        f"Failed to send message: Status {response.status} - {error_text}"
+                    )
+                    return False, None
 
         except Exception as e:
             self.logger.error(f"Error sending message: {str(e)}")
@@ -200,27 +223,27 @@ class A2AAgent:
             )
 
             # Send request to discovery service
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    config.A2A_DISCOVERY_URL,
-                    json=discovery_request.dict()
-                ) as response:
-                    if response.status == 200:
-                        discovery_data = await response.json()
-                        discovery_response = DiscoveryResponse(**discovery_data)
-                        
-                        # Find matching agent
-                        for agent in discovery_response.agents:
-                            if agent.agent_id == agent_id:
-                                # Return first endpoint
-                                if agent.endpoints:
-                                    return agent.endpoints[0].url
-                        
-                        self.logger.warning(f"Agent {agent_id} not found in discovery response")
-                        return None
-                    else:
-                        self.logger.error(f"Discovery request failed: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.post(
+                config.A2A_DISCOVERY_URL,
+                json=discovery_request.model_dump(mode="json")
+            ) as response:
+                if response.status == 200:
+                    discovery_data = await response.json()
+                    discovery_response = DiscoveryResponse(**discovery_data)
+                    
+                    # Find matching agent
+                    for agent in discovery_response.agents:
+                        if agent.agent_id == agent_id:
+                            # Return first endpoint
+                            if agent.endpoints:
+                                return agent.endpoints[0].url
+                    
+                    self.logger.warning(f"Agent {agent_id} not found in discovery response")
+                    return None
+                else:
+                    self.logger.error(f"Discovery request failed: {response.status}")
+                    return None
 
         except Exception as e:
             self.logger.error(f"Error in discovery: {str(e)}")
@@ -236,7 +259,7 @@ class A2AAgent:
                 self.logger.warning(f"Message validation failed: {error_message}")
                 return {
                     "status": "error",
-                    "errors": [e.dict() for e in validation_result.errors]
+                    "errors": [e.model_dump(mode="json") for e in validation_result.errors]
                 }
 
             # Log message receipt
@@ -274,7 +297,7 @@ class A2AAgent:
                 ):
                     return {
                         "status": "success",
-                        "agent": self.get_agent_card().dict()
+                        "agent": self.get_agent_card().model_dump(mode="json")
                     }
             
             return {
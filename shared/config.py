@@ -11,6 +11,7 @@ class BankConfig:
     reputation_score: int
     risk_appetite: str  # conservative|moderate|aggressive
     port: int
+    rpm: int = 300  # Max LLM requests per minute for this bank's agent
     
 @dataclass
 class SystemConfig:
@@ -26,6 +27,18 @@ class SystemConfig:
     
     # Bank Configurations (loaded dynamically from CSV)
     BANKS: List[BankConfig] = None
+    BANKS_BY_ID: Dict[str, BankConfig] = None
+    
+    # Bank pricing: applications below this amount are priced with the
+    # deterministic formula instead of an LLM call
+    PRICING_LLM_MIN_AMOUNT: float = float(os.getenv("PRICING_LLM_MIN_AMOUNT", "5000000"))
+    
+    # Wall-clock budget (seconds) for a bank's third-party data lookups; pricing
+    # proceeds with whatever has returned once it is spent
+    ENRICHMENT_TIMEOUT: float = float(os.getenv("ENRICHMENT_TIMEOUT", "3.0"))
+    
+    # Simulated latency for the demo identity check; off for real/benchmark runs
+    SIMULATE_VERIFICATION_DELAY: bool = os.getenv("SIMULATE_VERIFICATION_DELAY", "false").lower() == "true"
     
     # Streamlit UI
     STREAMLIT_PORT: int = 8501
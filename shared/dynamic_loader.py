@@ -61,6 +61,8 @@ def load_companies_from_csv() -> List[CompanyRegister]:
 
 def get_bank_by_id(bank_id: str) -> Optional[BankConfig]:
     """Get bank configuration by ID"""
+    if config.BANKS_BY_ID is not None:
+        return config.BANKS_BY_ID.get(bank_id)
     banks = load_banks_from_csv()
     return next((bank for bank in banks if bank.bank_id == bank_id), None)
 
@@ -73,9 +75,11 @@ def initialize_dynamic_config():
     """Initialize the global config with dynamic bank data"""
     try:
         config.BANKS = load_banks_from_csv()
+        config.BANKS_BY_ID = {bank.bank_id: bank for bank in config.BANKS}
         print(f"Loaded {len(config.BANKS)} banks from CSV")
         for bank in config.BANKS:
             print(f"  - {bank.bank_name} ({bank.bank_id}) on port {bank.port}")
     except Exception as e:
         print(f"Error loading banks: {e}")
         config.BANKS = []
+        config.BANKS_BY_ID = {}
@@ -0,0 +1,43 @@
+"""
+Async token-bucket rate limiter for outbound API calls
+"""
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """Allow at most max_rate acquisitions per time_period seconds
+
+    Tokens refill continuously, so short bursts up to max_rate are allowed and
+    sustained traffic is smoothed to the configured rate. Use as
+    ``async with limiter: ...`` around each rate-limited call.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.max_rate, self._tokens + elapsed * self.max_rate / self.time_period)
+        self._updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and consume it"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
@@ -1,5 +1,5 @@
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
@@ -102,6 +102,8 @@ class CreditIntent(BaseModel):
 
 class ESGScore(BaseModel):
     """ESG scoring breakdown"""
+    model_config = ConfigDict(frozen=True)
+    
     environmental_score: float = Field(..., ge=0, le=10)
     social_score: float = Field(..., ge=0, le=10)
     governance_score: float = Field(..., ge=0, le=10)
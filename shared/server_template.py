@@ -4,8 +4,9 @@ Unified Server Template for Banks and Companies
 """
 import sys
 import os
-from fastapi import FastAPI, HTTPException
-from typing import Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 import uvicorn
 import logging
 
@@ -15,7 +16,8 @@ sys.path.insert(0, project_root)
 
 from shared.config import config
 from shared.dynamic_loader import get_bank_by_id, load_companies_from_csv
-from shared.schema import WFAPBankCard, WFAPCompanyCard
+from shared.schema import CreditIntent, WFAPBankCard, WFAPCompanyCard
+from shared.validation import credit_intent_errors
 
 # Setup logging
 logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
@@ -29,6 +31,7 @@ class UnifiedServer:
         self.entity_id = entity_id
         self.entity_data = None
         self.port = None
+        self._bank_agent = None  # created on the first credit assessment
         
         # Load entity data
         if entity_type == 'bank':
@@ -48,7 +51,8 @@ class UnifiedServer:
         # Create FastAPI app
         self.app = FastAPI(
             title=f"WFAP {self.entity_data.bank_name if entity_type == 'bank' else self.entity_data.company_name} Agent",
-            version="1.0.0"
+            version="1.0.0",
+            default_response_class=ORJSONResponse
         )
         
         self.setup_routes()
@@ -56,96 +60,110 @@ class UnifiedServer:
     def setup_routes(self):
         """Setup FastAPI routes based on entity type"""
         
+        # Health, card and status payloads never change while the server runs,
+        # so they are serialized once here and returned as raw bytes
+        if self.entity_type == 'bank':
+            health = {
+                "status": "healthy",
+                "entity_type": "bank",
+                "bank_id": self.entity_data.bank_id,
+                "bank_name": self.entity_data.bank_name,
+                "port": self.port
+            }
+            card = WFAPBankCard(
+                agent_id=f"wfap-bank-{self.entity_data.bank_id.lower()}",
+                name=f"WFAP {self.entity_data.bank_name} Agent",
+                endpoints=[f"http://localhost:{self.port}/a2a"],
+                bank_details={
+                    "bank_id": self.entity_data.bank_id,
+                    "bank_name": self.entity_data.bank_name,
+                    "max_loan_amount": self.entity_data.max_loan_amount,
+                    "min_interest_rate": self.entity_data.min_interest_rate,
+                    "reputation_score": self.entity_data.reputation_score,
+                    "risk_appetite": self.entity_data.risk_appetite
+                }
+            )
+            status = {
+                "entity_type": "bank",
+                "bank_id": self.entity_data.bank_id,
+                "bank_name": self.entity_data.bank_name,
+                "max_loan_amount": self.entity_data.max_loan_amount,
+                "min_interest_rate": self.entity_data.min_interest_rate,
+                "reputation_score": self.entity_data.reputation_score,
+                "risk_appetite": self.entity_data.risk_appetite,
+                "port": self.port
+            }
+        else:
+            health = {
+                "status": "healthy",
+                "entity_type": "company",
+                "company_id": self.entity_data.company_id,
+                "company_name": self.entity_data.company_name,
+                "port": self.port
+            }
+            card = WFAPCompanyCard(
+                endpoints=[f"http://localhost:{self.port}/a2a"]
+            )
+            status = {
+                "entity_type": "company",
+                "company_id": self.entity_data.company_id,
+                "company_name": self.entity_data.company_name,
+                "annual_revenue": self.entity_data.annual_revenue,
+                "industry": self.entity_data.industry,
+                "port": self.port
+            }
+        health_bytes = orjson.dumps(health)
+        card_bytes = orjson.dumps(card.model_dump())
+        status_bytes = orjson.dumps(status)
+        
         # Common routes
         @self.app.get("/a2a/health")
         async def health_check():
             """Health check endpoint"""
-            if self.entity_type == 'bank':
-                return {
-                    "status": "healthy",
-                    "entity_type": "bank",
-                    "bank_id": self.entity_data.bank_id,
-                    "bank_name": self.entity_data.bank_name,
-                    "port": self.port
-                }
-            else:
-                return {
-                    "status": "healthy",
-                    "entity_type": "company",
-                    "company_id": self.entity_data.company_id,
-                    "company_name": self.entity_data.company_name,
-                    "port": self.port
-                }
+            return Response(health_bytes, media_type="application/json")
         
         @self.app.get("/a2a/card")
         async def get_agent_card():
             """Return agent card for A2A discovery"""
-            if self.entity_type == 'bank':
-                card = WFAPBankCard(
-                    agent_id=f"wfap-bank-{self.entity_data.bank_id.lower()}",
-                    name=f"WFAP {self.entity_data.bank_name} Agent",
-                    endpoints=[f"http://localhost:{self.port}/a2a"],
-                    bank_details={
-                        "bank_id": self.entity_data.bank_id,
-                        "bank_name": self.entity_data.bank_name,
-                        "max_loan_amount": self.entity_data.max_loan_amount,
-                        "min_interest_rate": self.entity_data.min_interest_rate,
-                        "reputation_score": self.entity_data.reputation_score,
-                        "risk_appetite": self.entity_data.risk_appetite
-                    }
-                )
-            else:
-                card = WFAPCompanyCard(
-                    endpoints=[f"http://localhost:{self.port}/a2a"]
-                )
-            
-            return card.dict()
+            return Response(card_bytes, media_type="application/json")
+        
+        @self.app.get("/wfap/status")
+        async def get_status():
+            """Get bank or company status"""
+            return Response(status_bytes, media_type="application/json")
         
         # Bank-specific routes
         if self.entity_type == 'bank':
-            @self.app.get("/wfap/status")
-            async def get_bank_status():
-                """Get bank status"""
-                return {
-                    "entity_type": "bank",
-                    "bank_id": self.entity_data.bank_id,
-                    "bank_name": self.entity_data.bank_name,
-                    "max_loan_amount": self.entity_data.max_loan_amount,
-                    "min_interest_rate": self.entity_data.min_interest_rate,
-                    "reputation_score": self.entity_data.reputation_score,
-                    "risk_appetite": self.entity_data.risk_appetite,
-                    "port": self.port
-                }
+            @self.app.on_event("shutdown")
+            async def close_bank_sessions():
+                """Release the bank agent's pooled HTTP connections"""
+                if self._bank_agent is not None:
+                    await self._bank_agent.aclose()
             
             @self.app.post("/wfap/assess-credit")
-            async def assess_credit_direct(intent_data: Dict[str, Any]):
+            async def assess_credit_direct(intent: CreditIntent):
                 """Direct credit assessment endpoint"""
                 try:
                     # Import here to avoid circular imports
                     from bank_agents.bank_agent import BankFinanceAgent
-                    from shared.schema import CreditIntent
                     
-                    intent = CreditIntent(**intent_data)
-                    bank_agent = BankFinanceAgent(self.entity_data)
-                    offer = await bank_agent.process_credit_intent(intent)
-                    return {"status": "success", "offer": offer.model_dump()}
+                    # One agent serves every request so its clients stay warm
+                    if self._bank_agent is None:
+                        self._bank_agent = BankFinanceAgent(self.entity_data)
+                    offer = await self._bank_agent.process_credit_intent(intent)
+                    # Serialized by orjson directly, skipping FastAPI's jsonable_encoder pass
+                    return ORJSONResponse({"status": "success", "offer": offer.model_dump()})
                 except Exception as e:
-                    logger.error(f"Error in credit assessment: {e}")
+                    logger.error("Error in credit assessment: %s", e)
                     raise HTTPException(status_code=500, detail=str(e))
         
         # Company-specific routes
         else:
-            @self.app.get("/wfap/status")
-            async def get_company_status():
-                """Get company status"""
-                return {
-                    "entity_type": "company",
-                    "company_id": self.entity_data.company_id,
-                    "company_name": self.entity_data.company_name,
-                    "annual_revenue": self.entity_data.annual_revenue,
-                    "industry": self.entity_data.industry,
-                    "port": self.port
-                }
+            @self.app.on_event("shutdown")
+            async def close_company_sessions():
+                """Release the company agent's pooled HTTP connections"""
+                from company_agent.agent import company_agent
+                await company_agent.close()
             
             @self.app.post("/wfap/discover-banks")
             async def discover_banks():
@@ -153,30 +171,45 @@ class UnifiedServer:
                 try:
                     # Import here to avoid circular imports
                     from company_agent.agent import company_agent
-                    result = await company_agent.discover_bank_agents()
-                    return result
+                    result = await company_agent.get_bank_agents()
+                    # Returned directly so FastAPI skips its jsonable_encoder pass
+                    return ORJSONResponse(result)
                 except Exception as e:
-                    logger.error(f"Error discovering banks: {e}")
+                    logger.error("Error discovering banks: %s", e)
                     raise HTTPException(status_code=500, detail=str(e))
             
             @self.app.post("/wfap/broadcast-intent")
-            async def broadcast_intent(intent_data: Dict[str, Any]):
+            async def broadcast_intent(intent: CreditIntent):
                 """Broadcast credit intent to all bank agents"""
                 try:
                     # Import here to avoid circular imports
                     from company_agent.agent import company_agent
-                    from shared.schema import CreditIntent
                     
-                    intent = CreditIntent(**intent_data)
                     offers = await company_agent.broadcast_credit_intent(intent)
-                    return {
+                    return ORJSONResponse({
                         "status": "success",
-                        "offers": [offer.dict() for offer in offers],
+                        "offers": [offer.model_dump() for offer in offers],
                         "count": len(offers)
-                    }
+                    })
                 except Exception as e:
-                    logger.error(f"Error broadcasting intent: {e}")
+                    logger.error("Error broadcasting intent: %s", e)
                     raise HTTPException(status_code=500, detail=str(e))
+            
+            @self.app.post("/wfap/broadcast-intent/stream")
+            async def broadcast_intent_stream(intent: CreditIntent):
+                """Broadcast credit intent, streaming each offer as one JSON line when it arrives"""
+                # Rejected here because errors raised mid-stream cannot change the status code
+                validation_errors = credit_intent_errors(intent)
+                if validation_errors:
+                    raise HTTPException(status_code=400, detail="; ".join(validation_errors))
+                
+                from company_agent.agent import company_agent
+                
+                async def offer_lines():
+                    async for offer in company_agent.iter_credit_offers(intent):
+                        yield orjson.dumps(offer.model_dump()) + b"\n"
+                
+                return StreamingResponse(offer_lines(), media_type="application/x-ndjson")
     
     def run(self):
         """Run the server"""
@@ -187,7 +220,9 @@ class UnifiedServer:
             self.app,
             host="localhost",
             port=self.port,
-            log_level=config.LOG_LEVEL.lower()
+            log_level=config.LOG_LEVEL.lower(),
+            # Per-request access lines cost a format and a write on every call
+            access_log=False
         )
 
 def start_entity_server(entity_type: str, entity_id: str):
@@ -0,0 +1,36 @@
+"""
+Business rules for credit intents, shared by the registry and company agents
+"""
+from typing import List
+from shared.schema import CreditIntent
+
+MIN_LOAN_AMOUNT = 1000
+MAX_LOAN_AMOUNT = 10000000  # 10M max
+MIN_DURATION_MONTHS = 6
+MAX_DURATION_MONTHS = 120
+MAX_REVENUE_MULTIPLE = 5.0  # 5x revenue max
+
+
+def credit_intent_errors(intent: CreditIntent) -> List[str]:
+    """Return the business rule violations for a credit intent (empty if valid)"""
+    validation_errors = []
+
+    # Check amount range
+    if intent.amount < MIN_LOAN_AMOUNT:
+        validation_errors.append("Minimum loan amount is $1,000")
+    if intent.amount > MAX_LOAN_AMOUNT:
+        validation_errors.append("Maximum loan amount is $10,000,000")
+
+    # Check duration range
+    if intent.duration_months < MIN_DURATION_MONTHS:
+        validation_errors.append("Minimum loan duration is 6 months")
+    if intent.duration_months > MAX_DURATION_MONTHS:
+        validation_errors.append("Maximum loan duration is 120 months")
+
+    # Check revenue ratio
+    if intent.annual_revenue and intent.annual_revenue > 0:
+        debt_ratio = intent.amount / intent.annual_revenue
+        if debt_ratio > MAX_REVENUE_MULTIPLE:
+            validation_errors.append("Loan amount cannot exceed 5x annual revenue")
+
+    return validation_errors
@@ -4,17 +4,23 @@ from shared.schema import (
     AuthToken, CreditIntent
 )
 from shared.config import config
+from shared.validation import credit_intent_errors
 import uvicorn
 from datetime import datetime, timedelta
 import uuid
 import json
 import os
+import threading
 
 REGISTRY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "registry")
 BANKS_FILE = os.path.join(REGISTRY_DIR, "registry_banks.json")
 COMPANIES_FILE = os.path.join(REGISTRY_DIR, "registry_companies.json")
 TOKENS_FILE = os.path.join(REGISTRY_DIR, "registry_tokens.json")
 
+# Sync handlers run in FastAPI's threadpool; registrations read, modify and
+# rewrite a whole file, so concurrent ones must not interleave
+REGISTER_LOCK = threading.Lock()
+
 def load_data(file):
     if not os.path.exists(file):
         return {}
@@ -52,13 +58,14 @@ def bank_register(payload: BankRegister):
     """
     Register a Bank
     """
-    banks = load_data(BANKS_FILE)
+    with REGISTER_LOCK:
+        banks = load_data(BANKS_FILE)
 
-    if payload.bank_id in banks:
-        raise HTTPException(status_code=400, detail="Bank already registered")
+        if payload.bank_id in banks:
+            raise HTTPException(status_code=400, detail="Bank already registered")
 
-    banks[payload.bank_id] = payload.model_dump()
-    save_data(BANKS_FILE, banks)
+        banks[payload.bank_id] = payload.model_dump()
+        save_data(BANKS_FILE, banks)
 
     return f"Bank {payload.bank_name} registered successfully."
 
@@ -101,14 +108,15 @@ def company_register(payload: CompanyRegister):
     """
     Register a Company
     """
-    companies = load_data(COMPANIES_FILE)
+    with REGISTER_LOCK:
+        companies = load_data(COMPANIES_FILE)
 
-    if payload.company_id in companies:
-        raise HTTPException(status_code=400, detail="Company already registered")
+        if payload.company_id in companies:
+            raise HTTPException(status_code=400, detail="Company already registered")
 
-    companies[payload.company_id] = payload.model_dump()
+        companies[payload.company_id] = payload.model_dump()
 
-    save_data(COMPANIES_FILE, companies)
+        save_data(COMPANIES_FILE, companies)
 
     return f"Company {payload.company_name} registered successfully."
 
@@ -182,25 +190,7 @@ async def validate_credit_intent(intent_data: dict):
         intent = CreditIntent(**intent_data)
         
         # Business rule validations
-        validation_errors = []
-        
-        # Check amount range
-        if intent.amount < 1000:
-            validation_errors.append("Minimum loan amount is $1,000")
-        if intent.amount > 10000000:  # 10M max
-            validation_errors.append("Maximum loan amount is $10,000,000")
-        
-        # Check duration range
-        if intent.duration_months < 6:
-            validation_errors.append("Minimum loan duration is 6 months")
-        if intent.duration_months > 120:
-            validation_errors.append("Maximum loan duration is 120 months")
-        
-        # Check revenue ratio
-        if intent.annual_revenue and intent.annual_revenue > 0:
-            debt_ratio = intent.amount / intent.annual_revenue
-            if debt_ratio > 5.0:  # 5x revenue max
-                validation_errors.append("Loan amount cannot exceed 5x annual revenue")
+        validation_errors = credit_intent_errors(intent)
         
         if validation_errors:
             return {
@@ -236,6 +226,7 @@ async def start_registry_api():
 def initialize_registry_files():
     """Initialize registry files with empty data"""
     print("[ThirdParty] Initializing registry files...")
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
     for file in [BANKS_FILE, COMPANIES_FILE, TOKENS_FILE]:
         with open(file, "w") as f:
             json.dump({}, f, indent=4)